@@ -0,0 +1,90 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled fast path for the MoQ varint codec and message parser.
+
+Optional: moqdbg.py falls back to its pure-Python implementations when
+this module is not built. Build in place with:
+
+    cythonize -i _moq_varint.pyx
+"""
+
+from cpython.bytes cimport PyBytes_FromStringAndSize
+
+
+cpdef tuple decode_varint(const unsigned char[::1] data, Py_ssize_t pos=0):
+    # QUIC 2-bit length prefix (RFC 9000)
+    cdef unsigned char b0 = data[pos]
+    cdef int size, i
+    cdef unsigned long long value
+    if b0 < 0x40:
+        return b0, pos + 1
+    size = 1 << (b0 >> 6)
+    if pos + size > data.shape[0]:
+        # Truncated at the buffer boundary; raise like the fallback
+        # instead of reading past the end under boundscheck=False
+        raise IndexError("truncated varint")
+    value = b0 & 0x3F
+    for i in range(1, size):
+        value = (value << 8) | data[pos + i]
+    return value, pos + size
+
+
+cpdef tuple decode_varint_two(const unsigned char[::1] data, Py_ssize_t pos=0):
+    """Decode two consecutive varints (the common msg_type + length header)."""
+    cdef unsigned char b0 = data[pos]
+    cdef unsigned char b1
+    cdef object first, second
+    if b0 < 0x40:
+        if pos + 1 >= data.shape[0]:
+            # Header split across stream events; match the fallback's
+            # IndexError so handle_moq_message logs and stops cleanly
+            raise IndexError("truncated varint header")
+        b1 = data[pos + 1]
+        if b1 < 0x40:
+            return b0, b1, pos + 2
+        second, pos = decode_varint(data, pos + 1)
+        return b0, second, pos
+    first, pos = decode_varint(data, pos)
+    second, pos = decode_varint(data, pos)
+    return first, second, pos
+
+
+cpdef list bulk_decode_varints(const unsigned char[::1] data):
+    """Decode back-to-back varints from an entire buffer in one native pass."""
+    cdef list out = []
+    cdef Py_ssize_t pos = 0, end = data.shape[0]
+    cdef unsigned char b0
+    cdef unsigned long long value
+    cdef int size, i
+    while pos < end:
+        b0 = data[pos]
+        if b0 < 0x40:
+            out.append(b0)
+            pos += 1
+            continue
+        size = 1 << (b0 >> 6)
+        if pos + size > end:
+            break
+        value = b0 & 0x3F
+        for i in range(1, size):
+            value = (value << 8) | data[pos + i]
+        out.append(value)
+        pos += size
+    return out
+
+
+cpdef list parse_messages(const unsigned char[::1] data):
+    """Split a (possibly coalesced) buffer into (msg_type, payload) pairs."""
+    cdef list out = []
+    cdef Py_ssize_t pos = 0, end = data.shape[0]
+    cdef object msg_type, length
+    while pos < end:
+        msg_type, length, pos = decode_varint_two(data, pos)
+        if pos + <Py_ssize_t>length > end:
+            length = end - pos
+        if <Py_ssize_t>length > 0:
+            out.append((msg_type,
+                        PyBytes_FromStringAndSize(<const char*>&data[pos], <Py_ssize_t>length)))
+            pos += <Py_ssize_t>length
+        else:
+            out.append((msg_type, b""))
+    return out
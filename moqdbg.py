@@ -7,13 +7,20 @@ Verbose: QUIC events, frames, varints. Stats: timings, loss, buffer, RTT, jitter
 Based on MoQ draft: binary framing over QUIC streams.
 
 TLS: Uses certifi for bundled CA certs (browser-like). Use --ignore-cert to bypass verification.
+Speed: installs uvloop as the event loop when available (pip install uvloop).
+Requires Python 3.11+.
 """
 
+from __future__ import annotations
+
 import argparse
 import asyncio
+import copy
+import functools
 import logging
 import sys
 import time
+from dataclasses import dataclass
 from typing import Optional, Dict, Any, List
 import ssl
 import os
@@ -25,33 +32,59 @@ from aioquic.asyncio.protocol import QuicConnectionProtocol
 from aioquic.quic.configuration import QuicConfiguration
 from aioquic.quic.events import QuicEvent, StreamDataReceived, StreamReset, ProtocolNegotiated
 
-# MoQ Varint helpers
+CA_FILE = certifi.where()
+
+# MoQ Varint helpers: QUIC 2-bit length prefix (RFC 9000), one
+# straight-line encoder per size class picked by bit width
+def _enc1(value: int) -> bytes:
+    return bytes((value,))
+
+def _enc2(value: int) -> bytes:
+    return (value | 0x4000).to_bytes(2, 'big')
+
+def _enc4(value: int) -> bytes:
+    return (value | 0x80000000).to_bytes(4, 'big')
+
+def _enc8(value: int) -> bytes:
+    return (value | 0xC000000000000000).to_bytes(8, 'big')
+
+_ENC = (_enc1, _enc2, _enc4, _enc8)
+
 def encode_varint(value: int) -> bytes:
-    if value < 0x40:
-        return bytes([value])
-    elif value < 0x2000:
-        return bytes([(value >> 6) | 0x80, value & 0x3F])
-    b = bytearray()
-    while True:
-        b.append(value & 0x7F)
-        value >>= 7
-        if value == 0:
-            break
-        b[-1] |= 0x80
-    b.reverse()
-    return bytes(b)
+    bits = value.bit_length()
+    return _ENC[(bits > 6) + (bits > 14) + (bits > 30)](value)
 
 def decode_varint(data: bytes, pos: int = 0) -> tuple[int, int]:
-    value = 0
-    shift = 0
-    while pos < len(data):
-        byte = data[pos]
-        value |= (byte & 0x7F) << shift
-        pos += 1
-        if (byte & 0x80) == 0:
-            break
-        shift += 7
-    return value, pos
+    # QUIC 2-bit length prefix (RFC 9000); fast path for the dominant
+    # single-byte case, one int.from_bytes for the rest
+    b0 = data[pos]
+    if b0 < 0x40:
+        return b0, pos + 1
+    size = 1 << (b0 >> 6)
+    end = pos + size
+    if end > len(data):
+        raise IndexError("truncated varint")
+    return int.from_bytes(data[pos:end], 'big') & ((1 << (8 * size - 2)) - 1), end
+
+def decode_varint_two(data: bytes, pos: int = 0) -> tuple[int, int, int]:
+    """Decode two consecutive varints (the common msg_type + length header)."""
+    b0 = data[pos]
+    if b0 < 0x40:
+        b1 = data[pos + 1]
+        if b1 < 0x40:
+            return b0, b1, pos + 2
+        value, pos = decode_varint(data, pos + 1)
+        return b0, value, pos
+    first, pos = decode_varint(data, pos)
+    second, pos = decode_varint(data, pos)
+    return first, second, pos
+
+try:
+    # Optional compiled fast path (build with: cythonize -i _moq_varint.pyx)
+    from _moq_varint import decode_varint, decode_varint_two
+    from _moq_varint import parse_messages as _parse_messages
+except ImportError:
+    _parse_messages = None
 
 # MoQ Message Types
 MOQ_MESSAGE_JOIN = 0x01
@@ -61,108 +94,243 @@ MOQ_MESSAGE_FRAME = 0x04
 MOQ_MESSAGE_ANNOUNCE_OK = 0x05
 MOQ_MESSAGE_ANNOUNCE_ERROR = 0x06
 
+# Media publish chunking: 16 KiB reads amortise per-send QUIC overhead,
+# with headroom in front of the payload for the frame header varints.
+MEDIA_CHUNK_SIZE = 16384
+MEDIA_HEADER_SPACE = 16
+
+def encode_varint_into(buf: bytearray, value: int) -> None:
+    """Append a varint to buf in place, skipping intermediate bytes objects."""
+    if value < 0x40:
+        buf.append(value)
+    elif value < 0x4000:
+        buf += (value | 0x4000).to_bytes(2, 'big')
+    elif value < 0x40000000:
+        buf += (value | 0x80000000).to_bytes(4, 'big')
+    else:
+        buf += (value | 0xC000000000000000).to_bytes(8, 'big')
+
+@functools.lru_cache(maxsize=64)
+def frame_message(msg_type: int, payload: bytes = b"") -> bytes:
+    """Frame a control message, memoised for the few shapes we send."""
+    buf = bytearray()
+    encode_varint_into(buf, msg_type)
+    encode_varint_into(buf, len(payload))
+    buf += payload
+    return bytes(buf)
+
+# Fixed control messages, framed once at import
+HEADERS_BODY = b"track:video codec:h264 profile:main"
+HEADERS_FRAME = frame_message(MOQ_MESSAGE_HEADERS, HEADERS_BODY)
+
+class LazyHex:
+    """Defers bytes.hex() until a log handler actually formats the record."""
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __str__(self) -> str:
+        return self._data.hex()
+
+@dataclass(slots=True)
+class MoQStats:
+    """Session counters; slots keep per-frame access a plain attribute load."""
+    connect_time: Optional[float] = None
+    first_frame_time: Optional[float] = None
+    packets_sent: int = 0
+    packets_lost: int = 0
+    buffer_size: int = 0
+    rtt: float = 0.0
+    jitter: float = 0.0
+
 class MoQProtocol(QuicConnectionProtocol):
     def __init__(self, *args, headers_only: bool = False, **kwargs):
         super().__init__(*args, **kwargs)
         self.streams: Dict[int, Dict[str, Any]] = {}
         self.logger = logging.getLogger("MoQ")
         self.headers_only = headers_only
-        self.stats = {
-            'connect_time': None,
-            'first_frame_time': None,
-            'packets_sent': 0,
-            'packets_lost': 0,
-            'buffer_size': 0,
-            'rtt': 0.0,
-            'frame_arrival_times': []
-        }
+        self.stats = MoQStats()
+        # Bound once; saves a global + attribute lookup per frame
+        self._time = time.time
+        # Reused TX scratch buffer so framing a send allocates once
+        self._tx_buf = bytearray()
+        # O(1) inter-arrival jitter state (RFC 3550-style EWMA estimator)
+        self._last_arrival: Optional[float] = None
+        self._mean_interarrival = 0.0
+        self._jitter_ewma = 0.0
+        # Output queue so handlers never block the event loop on stdout
+        self._print_queue: Optional[asyncio.Queue] = None
+        self._print_task: Optional[asyncio.Task] = None
 
     def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        loop = asyncio.get_event_loop()
         if transport is None:
-            self.logger.error(f"Transport is None in connection_made - event loop: {asyncio.get_event_loop()}")
+            self.logger.error(f"Transport is None in connection_made - event loop: {loop}")
             raise RuntimeError("Failed to initialize transport - possible TLS, ALPN, or server issue")
-        self.logger.debug(f"Asyncio connection made with transport: {type(transport).__name__}, event loop: {asyncio.get_event_loop()}")
-        self.stats['connect_time'] = time.time()
+        self.logger.debug("Asyncio connection made with transport: %s, event loop: %s", type(transport).__name__, loop)
+        self.stats.connect_time = self._time()
+        self._print_queue = asyncio.Queue(maxsize=256)
+        self._print_task = asyncio.ensure_future(self._drain_prints())
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self._print_task is not None:
+            self._print_task.cancel()
+            self._print_task = None
+        if self._print_queue is not None:
+            while not self._print_queue.empty():
+                sys.stdout.write(self._print_queue.get_nowait() + "\n")
+            self._print_queue = None
+        super().connection_lost(exc)
+
+    async def _drain_prints(self) -> None:
+        while True:
+            line = await self._print_queue.get()
+            sys.stdout.write(line + "\n")
+
+    def _emit(self, line: str) -> None:
+        """Queue a line for output; drop on overflow to stay real-time."""
+        if self._print_queue is None:
+            print(line)
+            return
+        try:
+            self._print_queue.put_nowait(line)
+        except asyncio.QueueFull:
+            pass
 
     def quic_event_received(self, event: QuicEvent) -> None:
         if isinstance(event, ProtocolNegotiated):
-            self.logger.debug(f"QUIC protocol negotiated at {self.stats['connect_time']:.3f}s (ALPN: {event.alpn_protocol})")
+            self.logger.debug("QUIC protocol negotiated at %.3fs (ALPN: %s)", self.stats.connect_time, event.alpn_protocol)
         elif isinstance(event, StreamDataReceived):
-            current_time = time.time()
-            if not self.stats['first_frame_time']:
-                self.stats['first_frame_time'] = current_time
-            self.stats['frame_arrival_times'].append(current_time)
+            stats = self.stats
+            current_time = self._time()
+            if not stats.first_frame_time:
+                stats.first_frame_time = current_time
+            if self._last_arrival is not None:
+                delta = current_time - self._last_arrival
+                self._jitter_ewma = 0.836 * self._jitter_ewma + 0.164 * abs(delta - self._mean_interarrival)
+                self._mean_interarrival = 0.836 * self._mean_interarrival + 0.164 * delta
+            self._last_arrival = current_time
             self.handle_moq_message(event.stream_id, event.data)
         elif isinstance(event, StreamReset):
-            self.logger.warning(f"Stream {event.stream_id} reset: {event.error_code}")
-            print(f"Stream {event.stream_id} interrupted. Possible stream termination.")
+            self.logger.warning("Stream %d reset: %s", event.stream_id, event.error_code)
+            self._emit(f"Stream {event.stream_id} interrupted. Possible stream termination.")
 
     def update_stats(self):
         try:
             quic_stats = self._quic.get_stats()
-            self.stats['packets_sent'] = quic_stats.get('sent_packets', 0)
-            self.stats['packets_lost'] = quic_stats.get('lost_packets', 0)
-            self.stats['buffer_size'] = self._quic.get_send_window()
-            self.stats['rtt'] = quic_stats.get('smoothed_rtt', 0.0) * 1000  # Convert to ms
-            if len(self.stats['frame_arrival_times']) > 1:
-                inter_arrivals = [
-                    self.stats['frame_arrival_times'][i] - self.stats['frame_arrival_times'][i-1]
-                    for i in range(1, len(self.stats['frame_arrival_times']))
-                ]
-                mean = sum(inter_arrivals) / len(inter_arrivals)
-                variance = sum((x - mean) ** 2 for x in inter_arrivals) / len(inter_arrivals)
-                self.stats['jitter'] = variance ** 0.5 * 1000  # Convert to ms
-            else:
-                self.stats['jitter'] = 0.0
+            self.stats.packets_sent = quic_stats.get('sent_packets', 0)
+            self.stats.packets_lost = quic_stats.get('lost_packets', 0)
+            self.stats.buffer_size = self._quic.get_send_window()
+            self.stats.rtt = quic_stats.get('smoothed_rtt', 0.0) * 1000  # Convert to ms
+            self.stats.jitter = self._jitter_ewma * 1000  # Convert to ms
         except Exception as e:
             self.logger.error(f"Error updating stats: {e}")
 
     def handle_moq_message(self, stream_id: int, data: bytes) -> None:
+        if _parse_messages is not None:
+            # Compiled path: split the whole (possibly coalesced) buffer in
+            # one native pass, then dispatch per message.
+            try:
+                for msg_type, payload in _parse_messages(data):
+                    self._handle_message(stream_id, msg_type, payload)
+                    if self.headers_only:
+                        break
+            except Exception as e:
+                self.logger.error(f"Error parsing message on stream {stream_id}: {e}")
+            return
         pos = 0
+        mv = memoryview(data)
         while pos < len(data):
             try:
-                msg_type, pos = decode_varint(data, pos)
-                length, pos = decode_varint(data, pos)
-                payload = data[pos:pos + length]
+                msg_type, length, pos = decode_varint_two(data, pos)
+                payload = mv[pos:pos + length]
                 pos += length
-
-                if msg_type == MOQ_MESSAGE_HEADERS:
-                    headers = payload.decode('utf-8', errors='ignore').split()
-                    print(f"Headers (stream {stream_id}):")
-                    for header in headers:
-                        print(f"  {header}")
-                elif msg_type == MOQ_MESSAGE_ANNOUNCE_OK:
-                    print(f"ANNOUNCE_OK (stream {stream_id}): {payload.decode('utf-8', errors='ignore')}")
-                elif msg_type == MOQ_MESSAGE_ANNOUNCE_ERROR:
-                    print(f"ANNOUNCE_ERROR (stream {stream_id}): {payload.decode('utf-8', errors='ignore')}")
-                elif msg_type == MOQ_MESSAGE_FRAME and not self.headers_only:
-                    print(f"Media Frame (stream {stream_id}, {len(payload)} bytes): {payload.hex()[:50]}...")
-                    try:
-                        print(f"  Content: {payload.decode('utf-8')[:100]}")
-                    except UnicodeDecodeError:
-                        pass
-                else:
-                    self.logger.debug(f"Unknown msg type {msg_type} on {stream_id}")
-
+                self._handle_message(stream_id, msg_type, payload)
                 if self.headers_only:
                     break
             except Exception as e:
                 self.logger.error(f"Error parsing message on stream {stream_id}: {e}")
                 break
 
+    def _handle_message(self, stream_id: int, msg_type: int, payload) -> None:
+        # Literal int cases let CPython 3.11+'s adaptive interpreter
+        # specialise this into near-jump-table dispatch
+        match msg_type:
+            case 0x03:  # MOQ_MESSAGE_HEADERS
+                self._handle_headers(stream_id, payload)
+            case 0x04:  # MOQ_MESSAGE_FRAME
+                self._handle_frame(stream_id, payload)
+            case 0x05:  # MOQ_MESSAGE_ANNOUNCE_OK
+                self._handle_announce_ok(stream_id, payload)
+            case 0x06:  # MOQ_MESSAGE_ANNOUNCE_ERROR
+                self._handle_announce_error(stream_id, payload)
+            case _:
+                self.logger.debug("Unknown msg type %s on %d", msg_type, stream_id)
+
+    def _handle_headers(self, stream_id: int, payload) -> None:
+        headers = str(payload, 'utf-8', 'ignore').split()
+        self._emit(f"Headers (stream {stream_id}):")
+        for header in headers:
+            self._emit(f"  {header}")
+
+    def _handle_announce_ok(self, stream_id: int, payload) -> None:
+        self._emit(f"ANNOUNCE_OK (stream {stream_id}): {str(payload, 'utf-8', 'ignore')}")
+
+    def _handle_announce_error(self, stream_id: int, payload) -> None:
+        self._emit(f"ANNOUNCE_ERROR (stream {stream_id}): {str(payload, 'utf-8', 'ignore')}")
+
+    def _handle_frame(self, stream_id: int, payload) -> None:
+        if self.headers_only:
+            return
+        # Slice first: hex()/decode() on the full payload would
+        # materialise strings proportional to the frame size.
+        self._emit(f"Media Frame (stream {stream_id}, {len(payload)} bytes): {payload[:25].hex()}...")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emit(f"  Content: {str(payload[:100], 'utf-8', 'replace')}")
+
     def send_control_message(self, stream_id: int, msg_type: int, payload: bytes = b"") -> None:
         try:
-            msg = encode_varint(msg_type) + encode_varint(len(payload)) + payload
+            msg = frame_message(msg_type, payload)
             self._quic.send_stream_data(stream_id, msg)
-            self.logger.debug(f"TX Control {msg_type} on {stream_id}: {msg.hex()}")
+            self.logger.debug("TX Control %d on %d: %s", msg_type, stream_id, LazyHex(msg))
         except Exception as e:
             self.logger.error(f"Failed to send control message on {stream_id}: {e}")
 
+    def send_prebuilt(self, stream_id: int, frame_bytes: bytes) -> None:
+        try:
+            self._quic.send_stream_data(stream_id, frame_bytes)
+            self.logger.debug("TX prebuilt frame on %d: %s", stream_id, LazyHex(frame_bytes))
+        except Exception as e:
+            self.logger.error(f"Failed to send prebuilt frame on {stream_id}: {e}")
+
+    def send_media_frame_into(self, stream_id: int, mv: memoryview, offset: int, length: int) -> None:
+        """Frame and send payload already sitting at mv[offset:offset+length].
+
+        The header varints are written into the headroom in front of the
+        payload, so no per-chunk payload copy or concatenation happens.
+        """
+        try:
+            header = self._tx_buf
+            del header[:]
+            encode_varint_into(header, MOQ_MESSAGE_FRAME)
+            encode_varint_into(header, length)
+            start = offset - len(header)
+            mv[start:offset] = header
+            self._quic.send_stream_data(stream_id, bytes(mv[start:offset + length]))
+            self.logger.debug("TX Frame on %d (%d bytes)", stream_id, length)
+        except Exception as e:
+            self.logger.error(f"Failed to send media frame on {stream_id}: {e}")
+
     def send_media_frame(self, stream_id: int, frame: bytes) -> None:
         try:
-            msg = encode_varint(MOQ_MESSAGE_FRAME) + encode_varint(len(frame)) + frame
-            self._quic.send_stream_data(stream_id, msg)
-            self.logger.debug(f"TX Frame on {stream_id} ({len(frame)} bytes)")
+            buf = self._tx_buf
+            del buf[:]
+            encode_varint_into(buf, MOQ_MESSAGE_FRAME)
+            encode_varint_into(buf, len(frame))
+            buf += frame
+            self._quic.send_stream_data(stream_id, bytes(buf))
+            self.logger.debug("TX Frame on %d (%d bytes)", stream_id, len(frame))
         except Exception as e:
             self.logger.error(f"Failed to send media frame on {stream_id}: {e}")
 
@@ -173,39 +341,53 @@ class MoQProtocol(QuicConnectionProtocol):
             self.logger.error(f"Error getting stream ID: {e}")
             raise
 
+def _udp_probe(host: str, port: int) -> Optional[str]:
+    """Best-effort UDP reachability check; returns an error string on failure."""
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(2)
+        sock.connect((host, port))
+        sock.close()
+        return None
+    except Exception as e:
+        return str(e)
+
 async def run_moq(host: str, port: int, action: str, resource: Optional[str] = None,
                   media_file: Optional[str] = None, headers_only: bool = False,
                   verbose: bool = False, stats: bool = False, alpn: Optional[str] = None,
-                  ignore_cert: bool = False, retries: int = 3) -> None:
+                  ignore_cert: bool = False, retries: int = 3, diagnose: bool = False) -> None:
     start_time = time.time()
+    if verbose:
+        logging.basicConfig(level=logging.DEBUG)
     alpn_protocols = [alpn] if alpn else ["moq-00", "moq-01", "h3", "moq-lite", "moq"]
+    # Build the configuration once: load_verify_locations parses the whole
+    # CA bundle, so doing it per attempt repeats hundreds of cert parses.
+    base_config = QuicConfiguration(
+        alpn_protocols=alpn_protocols,
+        is_client=True,
+        verify_mode=ssl.CERT_NONE if ignore_cert else ssl.CERT_REQUIRED
+    )
+    if not ignore_cert:
+        base_config.load_verify_locations(cafile=CA_FILE)
+
+    # Optional one-shot reachability probe; it only sets a default peer on a
+    # DGRAM socket, so it is diagnostic, not part of the normal fast path.
+    if diagnose:
+        error = await asyncio.get_event_loop().run_in_executor(None, _udp_probe, host, port)
+        if error is not None:
+            print(f"UDP socket test to {host}:{port} failed: {error}")
+            logging.error(f"UDP socket error: {error}")
+            print("Check network connectivity (UDP/443) or firewall.")
+            return
+        print(f"UDP socket test to {host}:{port} succeeded")
+
     for attempt in range(1, retries + 1):
-        configuration = QuicConfiguration(
-            alpn_protocols=alpn_protocols,
-            is_client=True,
-            verify_mode=ssl.CERT_NONE if ignore_cert else ssl.CERT_REQUIRED
-        )
+        configuration = copy.copy(base_config)
         if not ignore_cert:
-            configuration.load_verify_locations(cafile=certifi.where())
             print(f"Attempt {attempt}/{retries}: Using certifi CA bundle for server verification")
         else:
             print(f"Attempt {attempt}/{retries}: Ignoring certificate verification (--ignore-cert)")
 
-        # Test UDP socket
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(2)
-            sock.connect((host, port))
-            sock.close()
-            print(f"Attempt {attempt}/{retries}: UDP socket test to {host}:{port} succeeded")
-        except Exception as e:
-            print(f"Attempt {attempt}/{retries}: UDP socket test failed: {e}")
-            logging.error(f"UDP socket error: {e}")
-            if attempt == retries:
-                print("All UDP tests failed. Check network connectivity (UDP/443) or firewall.")
-                return
-            continue
-
         try:
             async with connect(
                 host=host,
@@ -223,9 +405,6 @@ async def run_moq(host: str, port: int, action: str, resource: Optional[str] = N
                         print("All attempts failed to initialize control stream.")
                     continue
 
-                if verbose:
-                    logging.basicConfig(level=logging.DEBUG)
-
                 # Try provided resource, fall back to /watch if it fails
                 active_resource = resource
                 try:
@@ -234,24 +413,25 @@ async def run_moq(host: str, port: int, action: str, resource: Optional[str] = N
                         protocol.send_control_message(control_stream, MOQ_MESSAGE_ANNOUNCE, announce_payload)
                         if media_file and not headers_only:
                             try:
+                                buf = bytearray(MEDIA_HEADER_SPACE + MEDIA_CHUNK_SIZE)
+                                mv = memoryview(buf)
                                 with open(media_file, 'rb') as f:
-                                    while chunk := f.read(1024):
-                                        protocol.send_media_frame(control_stream, chunk)
+                                    while n := f.readinto(mv[MEDIA_HEADER_SPACE:]):
+                                        protocol.send_media_frame_into(control_stream, mv, MEDIA_HEADER_SPACE, n)
                                         protocol.update_stats()
                                         if stats:
-                                            print(f"Stats: Sent {protocol.stats['packets_sent']} packets, "
-                                                  f"Lost {protocol.stats['packets_lost']}, "
-                                                  f"Buffer {protocol.stats['buffer_size']} bytes, "
-                                                  f"RTT {protocol.stats['rtt']:.2f} ms, "
-                                                  f"Jitter {protocol.stats['jitter']:.2f} ms")
+                                            print(f"Stats: Sent {protocol.stats.packets_sent} packets, "
+                                                  f"Lost {protocol.stats.packets_lost}, "
+                                                  f"Buffer {protocol.stats.buffer_size} bytes, "
+                                                  f"RTT {protocol.stats.rtt:.2f} ms, "
+                                                  f"Jitter {protocol.stats.jitter:.2f} ms")
                             except FileNotFoundError:
                                 print(f"Error: Media file {media_file} not found.")
                                 return
                     elif action == "join" and resource:
                         join_payload = f"resource:{resource}".encode()
                         protocol.send_control_message(control_stream, MOQ_MESSAGE_JOIN, join_payload)
-                        headers = b"track:video codec:h264 profile:main"
-                        protocol.send_control_message(control_stream, MOQ_MESSAGE_HEADERS, headers)
+                        protocol.send_prebuilt(control_stream, HEADERS_FRAME)
                         try:
                             await asyncio.sleep(30 if not headers_only else 5)
                         except asyncio.CancelledError:
@@ -267,8 +447,7 @@ async def run_moq(host: str, port: int, action: str, resource: Optional[str] = N
                         active_resource = "/watch"
                         join_payload = f"resource:{active_resource}".encode()
                         protocol.send_control_message(control_stream, MOQ_MESSAGE_JOIN, join_payload)
-                        headers = b"track:video codec:h264 profile:main"
-                        protocol.send_control_message(control_stream, MOQ_MESSAGE_HEADERS, headers)
+                        protocol.send_prebuilt(control_stream, HEADERS_FRAME)
                         try:
                             await asyncio.sleep(30 if not headers_only else 5)
                         except asyncio.CancelledError:
@@ -277,16 +456,16 @@ async def run_moq(host: str, port: int, action: str, resource: Optional[str] = N
 
                 if stats:
                     protocol.update_stats()
-                    connect_duration = (protocol.stats['connect_time'] - start_time) * 1000 if protocol.stats['connect_time'] else 0
-                    transfer_duration = (protocol.stats['first_frame_time'] - protocol.stats['connect_time']) * 1000 if protocol.stats['first_frame_time'] else 0
+                    connect_duration = (protocol.stats.connect_time - start_time) * 1000 if protocol.stats.connect_time else 0
+                    transfer_duration = (protocol.stats.first_frame_time - protocol.stats.connect_time) * 1000 if protocol.stats.first_frame_time else 0
                     print(f"\nNetwork Stats for {active_resource}:")
                     print(f"  Connection Time: {connect_duration:.2f} ms")
                     print(f"  First Frame Time: {transfer_duration:.2f} ms")
-                    print(f"  Packets Sent: {protocol.stats['packets_sent']}")
-                    print(f"  Packets Lost: {protocol.stats['packets_lost']}")
-                    print(f"  Buffer Available: {protocol.stats['buffer_size']} bytes")
-                    print(f"  RTT: {protocol.stats['rtt']:.2f} ms")
-                    print(f"  Jitter: {protocol.stats['jitter']:.2f} ms")
+                    print(f"  Packets Sent: {protocol.stats.packets_sent}")
+                    print(f"  Packets Lost: {protocol.stats.packets_lost}")
+                    print(f"  Buffer Available: {protocol.stats.buffer_size} bytes")
+                    print(f"  RTT: {protocol.stats.rtt:.2f} ms")
+                    print(f"  Jitter: {protocol.stats.jitter:.2f} ms")
                 return  # Success, exit retry loop
 
         except ssl.SSLError as e:
@@ -318,6 +497,13 @@ async def run_moq(host: str, port: int, action: str, resource: Optional[str] = N
                 await asyncio.sleep(2)
 
 if __name__ == "__main__":
+    try:
+        # Optional: 2-4x faster event loop, pip install uvloop
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     parser = argparse.ArgumentParser(description="MoQ Debug Tool")
     parser.add_argument("host", help="MoQ server/relay host (e.g., moq.dev)")
     parser.add_argument("-p", "--port", type=int, default=443, help="Port (default 443 for QUIC)")
@@ -330,6 +516,7 @@ if __name__ == "__main__":
     parser.add_argument("-s", "--stats", action="store_true", help="Show timings, loss, buffer, RTT, jitter")
     parser.add_argument("--alpn", help="Custom ALPN (e.g., moq-lite)")
     parser.add_argument("--ignore-cert", action="store_true", help="Ignore certificate verification errors")
+    parser.add_argument("--diagnose", action="store_true", help="Probe UDP reachability before connecting")
 
     args = parser.parse_args()
 
@@ -338,4 +525,5 @@ if __name__ == "__main__":
         sys.exit(1)
 
     asyncio.run(run_moq(args.host, args.port, args.action, args.resource, args.file,
-                        args.headers, args.verbose, args.stats, args.alpn, args.ignore_cert))
+                        args.headers, args.verbose, args.stats, args.alpn, args.ignore_cert,
+                        diagnose=args.diagnose))